@@ -8,20 +8,10 @@ To create a new agent:
 1. Create a new Python file in this directory
 2. Define a class that inherits from BaseAgent
 3. Implement all the abstract methods
-4. The agent will be automatically discovered and registered
+4. Add it to AGENT_CLASSES in registry.py (or expose it through the
+   "ollama_desktop.agents" entry-point group from another package)
 """
 
-import logging
-
-# Configure logging for agents
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
-
 from .base_agent import BaseAgent
 from .registry import agent_registry
 
@@ -5,23 +5,53 @@ This module defines the BaseAgent abstract class that all agents must implement.
 It provides the foundation for creating new agents in the system.
 """
 
+import asyncio
+import inspect
+import logging
+import sys
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Union, AsyncGenerator, Callable
+from types import MappingProxyType
+from typing import Dict, List, Literal, Mapping, Optional, Tuple, TypedDict, Any, AsyncIterator, Callable
 
+from api.async_utils import stream_from_thread
+
+logger = logging.getLogger("base_agent")
+
+
+class FunctionDef(TypedDict):
+    """The function part of an Ollama/OpenAI-style tool definition."""
+    name: str
+    description: str
+    parameters: Dict[str, Any]
+
+
+class ToolDef(TypedDict):
+    """A tool definition as passed to the Ollama chat API."""
+    type: Literal["function"]
+    function: FunctionDef
+
+
+# Read-only tool index shared by every agent that defines no tools
+_NO_TOOLS: Mapping[str, ToolDef] = MappingProxyType({})
 
 class BaseAgent(ABC):
     """
     Abstract base class for all agents in the system.
     
     All agent implementations must inherit from this class and implement
-    its abstract methods.
+    its abstract methods. Subclasses that add instance attributes must
+    declare them in their own __slots__.
     """
+
+    __slots__ = ("agent_id", "name", "description", "icon", "tags", "config",
+                 "example_prompts", "tools", "available_functions", "_metadata",
+                 "_tools_by_name")
     
     def __init__(self, agent_id: str, name: str, description: str, 
                  icon: str = "", tags: List[str] = None, 
                  config: Dict[str, Any] = None, 
                  example_prompts: List[str] = None,
-                 tools: Optional[List[Any]] = None):
+                 tools: Optional[List[ToolDef]] = None):
         """
         Initialize a new agent.
         
@@ -42,11 +72,55 @@ class BaseAgent(ABC):
         self.name = name
         self.description = description
         self.icon = icon
-        self.tags = tags or []
+        # Tags come from a small shared vocabulary; interning lets equal tags
+        # across agents share one string and compare by identity
+        self.tags = tuple(sys.intern(tag) for tag in tags) if tags else ()
         self.config = config or {}
-        self.example_prompts = example_prompts or []
-        self.tools = tools or []
+        # Stored as tuples: these never change after construction and are
+        # handed out as-is by get_metadata()/get_tools() without defensive copies.
+        # Agents without them all share the empty tuple and an empty tool index.
+        self.example_prompts = tuple(example_prompts) if example_prompts else ()
+        self.tools = tuple(tools) if tools else ()
+        self._tools_by_name = self._index_tools(self.tools) if self.tools else _NO_TOOLS
         self.available_functions: Dict[str, Callable] = {}
+        self._metadata: Optional[Dict[str, Any]] = None  # Built on first get_metadata()
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        """
+        Pickle only the agent's definition as a flat tuple.
+
+        Derived caches are rebuilt on unpickling, and runtime resources held by
+        subclasses are not transferred, so an unpickled agent must be
+        initialize()d again in the receiving process.
+        """
+        return (self.agent_id, self.name, self.description, self.icon, self.tags,
+                self.config, self.example_prompts, self.tools, self.available_functions)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        """Restore an agent pickled by __getstate__."""
+        (self.agent_id, self.name, self.description, self.icon, self.tags,
+         self.config, self.example_prompts, self.tools, self.available_functions) = state
+        self._tools_by_name = self._index_tools(self.tools) if self.tools else _NO_TOOLS
+        self._metadata = None
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Reject process()/process_stream() overrides with the wrong async shape.
+
+        The routes await process() and iterate process_stream() with async for,
+        so a mistake here would otherwise only surface on the first request.
+        """
+        super().__init_subclass__(**kwargs)
+        process = cls.__dict__.get("process")
+        if process is not None and not inspect.iscoroutinefunction(process):
+            raise TypeError(f"{cls.__name__}.process must be defined with 'async def'.")
+        process_stream = cls.__dict__.get("process_stream")
+        if process_stream is not None and (inspect.iscoroutinefunction(process_stream)
+                                           or inspect.isgeneratorfunction(process_stream)):
+            raise TypeError(
+                f"{cls.__name__}.process_stream must be an async generator "
+                "('async def' with 'yield') or return an async iterator."
+            )
         
     @abstractmethod
     async def process(self, message: str, session_id: str = None, 
@@ -65,10 +139,13 @@ class BaseAgent(ABC):
         pass
     
     @abstractmethod
-    async def process_stream(self, message: str, session_id: str = None,
-                           context: Dict[str, Any] = None) -> AsyncGenerator[str, None]:
+    def process_stream(self, message: str, session_id: str = None,
+                       context: Dict[str, Any] = None) -> AsyncIterator[str]:
         """
         Process a message and stream the response.
+
+        Implementations must be async generators (``async def`` with ``yield``).
+        Agents without real streaming can ``return self._fallback_stream(...)``.
         
         Args:
             message: The user's message to process
@@ -76,47 +153,161 @@ class BaseAgent(ABC):
             context: Additional context information
             
         Returns:
-            An async generator yielding response chunks
+            An async iterator yielding response chunks
+        """
+
+    async def process_batch(self, messages: List[str],
+                            session_ids: Optional[List[Optional[str]]] = None,
+                            contexts: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[str]:
+        """
+        Process several messages and return their responses in order.
+
+        The default runs process() for every message concurrently. Agents that
+        wrap a backend able to batch prompts can override this to send them
+        in a single call.
+
+        Args:
+            messages: The user messages to process
+            session_ids: Optional session identifier per message
+            contexts: Optional context per message
+
+        Returns:
+            The agent's responses, one per message
+        """
+        count = len(messages)
+        session_ids = session_ids or [None] * count
+        contexts = contexts or [None] * count
+        if len(session_ids) != count or len(contexts) != count:
+            raise ValueError("session_ids and contexts must match the number of messages.")
+        return list(await asyncio.gather(*(
+            self.process(message, session_id=session_id, context=context)
+            for message, session_id, context in zip(messages, session_ids, contexts)
+        )))
+
+    async def _fallback_stream(self, message: str, session_id: str = None,
+                               context: Dict[str, Any] = None) -> AsyncIterator[str]:
         """
-        raise NotImplementedError("Streaming not implemented for this agent.")
-        yield
+        Stream the complete process() response as a single chunk.
+
+        Args:
+            message: The user's message to process
+            session_id: Optional session identifier for maintaining state
+            context: Additional context information
+
+        Returns:
+            An async generator yielding exactly one chunk
+        """
+        yield await self.process(message, session_id=session_id, context=context)
     
+    def _stream_from_thread(self, produce: Callable[[Callable[[str], None]], None],
+                            maxsize: int = 256) -> AsyncIterator[str]:
+        """
+        Bridge a blocking, callback-based token producer to an async stream.
+
+        See api.async_utils.stream_from_thread; agents get a deeper default
+        buffer since token chunks are small.
+
+        Args:
+            produce: Blocking function that calls ``emit(chunk)`` for each chunk
+            maxsize: Maximum number of chunks buffered between thread and loop
+
+        Returns:
+            An async generator yielding the produced chunks
+        """
+        return stream_from_thread(produce, maxsize)
+
     def get_metadata(self) -> Dict[str, Any]:
         """
         Get the agent's metadata.
         
+        The fields never change after construction, so the dictionary is built
+        once and the same (shared, do not mutate) instance is returned afterwards.
+
         Returns:
             A dictionary containing the agent's metadata
         """
-        return {
-            "id": self.agent_id,
-            "name": self.name,
-            "description": self.description,
-            "icon": self.icon,
-            "tags": self.tags,
-            "examplePrompts": self.example_prompts,
-            "config": self.config,
-            "tools": self.tools
-        }
+        if self._metadata is None:
+            self._metadata = {
+                "id": self.agent_id,
+                "name": self.name,
+                "description": self.description,
+                "icon": self.icon,
+                "tags": self.tags,
+                "examplePrompts": self.example_prompts,
+                "config": self.config,
+                "tools": self.tools
+            }
+        return self._metadata
     
-    def get_tools(self) -> List[Any]:
+    def get_tools(self) -> Tuple[ToolDef, ...]:
         """
-        Return the list of tool definitions for this agent.
+        Return the tool definitions for this agent (read-only tuple).
         """
         return self.tools
 
+    def resolve_tool(self, name: str) -> Optional[ToolDef]:
+        """
+        Look up a tool definition by function name.
+
+        Args:
+            name: The function name the model called.
+
+        Returns:
+            The tool definition, or None if this agent has no such tool.
+        """
+        return self._tools_by_name.get(name)
+
+    @staticmethod
+    def _index_tools(tools: Tuple[ToolDef, ...]) -> Dict[str, ToolDef]:
+        """
+        Validate function-style tool definitions and index them by name.
+
+        The ToolDef annotation is not enforced at runtime, so entries that are
+        not function definitions (e.g. plain Python callables accepted by the
+        Ollama client) are passed through to the model untouched and not indexed.
+
+        Raises:
+            ValueError: If a function tool has no name or a name is duplicated.
+        """
+        tools_by_name: Dict[str, ToolDef] = {}
+        for tool in tools:
+            if not isinstance(tool, dict) or "function" not in tool:
+                continue
+            name = tool["function"].get("name") if isinstance(tool["function"], dict) else None
+            if not name:
+                raise ValueError("Tool definition is missing 'function.name'.")
+            if name in tools_by_name:
+                raise ValueError(f"Duplicate tool definition for '{name}'.")
+            tools_by_name[sys.intern(name)] = tool
+        return tools_by_name
+
     def register_tool_function(self, name: str, func: Callable):
         """
         Register the implementation function for a tool.
 
         Args:
             name: The name of the tool function (must match the name in the tool definition).
+                Names are interned, so lookups with an interned key hit the identity fast path.
             func: The callable function that implements the tool.
         """
-        if not callable(func):
-            raise ValueError(f"Provided item for tool '{name}' is not callable.")
-        self.available_functions[name] = func
-        print(f"Registered tool function: {name}")
+        self.register_tool_functions({name: func})
+
+    def register_tool_functions(self, funcs: Mapping[str, Callable]):
+        """
+        Register the implementation functions for several tools at once.
+
+        Every function is validated before any is registered, so a bad entry
+        leaves the agent unchanged, and the mapping is merged in a single update.
+
+        Args:
+            funcs: Mapping of tool name (matching the tool definition) to callable.
+        """
+        for name, func in funcs.items():
+            if not callable(func):
+                raise ValueError(f"Provided item for tool '{name}' is not callable.")
+        self.available_functions.update({sys.intern(name): func for name, func in funcs.items()})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Registered tool functions: %s", ", ".join(funcs))
     
     @abstractmethod
     async def initialize(self) -> bool:
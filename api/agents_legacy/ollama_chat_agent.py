@@ -0,0 +1,151 @@
+"""
+Ollama Chat Agent
+
+Shared implementation for agents that answer through an Ollama chatbot.
+Concrete agents only supply their metadata, config and user-facing messages.
+"""
+
+import logging
+import os
+from typing import Dict, Any, AsyncGenerator
+
+from .base_agent import BaseAgent
+
+logger = logging.getLogger("ollama_chat_agent")
+
+
+class OllamaChatAgent(BaseAgent):
+    """
+    Base class for chat-style agents backed by an Ollama chatbot.
+
+    Subclasses pass their metadata to __init__ and may override the message
+    attributes below to localize the responses shown to users.
+    """
+
+    __slots__ = ("chatbot", "fallback_mode")
+
+    # Shown when the chatbot could not be created; the user message is appended
+    fallback_prefix = "I'm operating in fallback mode. Your message was: "
+    not_initialized_message = "Sorry, the assistant is not initialized properly. Please try again later."
+    error_message = "I encountered an error processing your request. Please try again."
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the agent; arguments are forwarded to BaseAgent."""
+        super().__init__(*args, **kwargs)
+        self.chatbot = None  # OllamaMCPAgent once initialized
+        self.fallback_mode = False
+
+    def __setstate__(self, state):
+        """Restore a pickled agent; the chatbot is recreated by initialize()."""
+        super().__setstate__(state)
+        self.chatbot = None
+        self.fallback_mode = False
+
+    async def initialize(self) -> bool:
+        """
+        Initialize the agent and set up the Ollama chatbot.
+
+        Returns:
+            True if initialization was successful, False otherwise
+        """
+        try:
+            # Imported here so registry discovery does not pay for the Ollama
+            # client stack; if it is not available, use fallback mode
+            try:
+                from api.ollama_client import OllamaPackage
+            except ImportError:
+                logger.info("Using fallback mode for %s due to missing dependencies", self.name)
+                self.fallback_mode = True
+                return True
+
+            # Initialize the Ollama agent with this agent's own system message
+            self.chatbot = await OllamaPackage.create_agent(
+                model_name=self.config["default_model"],
+                system_message=self.config["system_message"],
+                use_config_system_prompt=False,
+                # Pass the base_url if configured, otherwise the client default is used
+                base_url=os.getenv("OLLAMA_HOST")
+            )
+            # Register the tool implementations with the agno agent so the model
+            # can call them; agno derives each schema from the function itself
+            if self.available_functions:
+                self.chatbot.add_tools(list(self.available_functions.values()))
+            logger.info("Successfully initialized %s with model %s", self.name, self.config['default_model'])
+            return True
+        except Exception as e:
+            logger.error("Failed to initialize %s: %s", self.name, e)
+            # Use fallback mode if chatbot initialization fails
+            self.fallback_mode = True
+            logger.info("Using fallback mode for %s after initialization failure", self.name)
+            return True  # Return True so the agent is still registered
+
+    async def process(self, message: str, session_id: str = None,
+                     context: Dict[str, Any] = None) -> str:
+        """
+        Process a message and return a response, using tools if necessary.
+
+        Args:
+            message: The user's message
+            session_id: Optional session identifier
+            context: Additional context information
+
+        Returns:
+            The agent's response
+        """
+        if self.fallback_mode:
+            return self.fallback_prefix + message
+
+        if not self.chatbot:
+            return self.not_initialized_message
+
+        try:
+            # Tools were registered on the agent in initialize()
+            return await self.chatbot.chat(message)
+        except Exception as e:
+            logger.error("Error in %s processing: %s", self.name, e)
+            return self.error_message
+
+    async def process_stream(self, message: str, session_id: str = None,
+                           context: Dict[str, Any] = None) -> AsyncGenerator[str, None]:
+        """
+        Process a message and stream the response, using tools if necessary.
+
+        Args:
+            message: The user's message
+            session_id: Optional session identifier
+            context: Additional context information
+
+        Returns:
+            An async generator yielding response chunks
+        """
+        if self.fallback_mode:
+            yield self.fallback_prefix + message
+            return
+
+        if not self.chatbot or not self.chatbot.agent:
+            yield self.not_initialized_message
+            return
+
+        try:
+            # Stream natively from the agno agent; registered tools are still
+            # called mid-run, so there is no need for a non-streaming path
+            run_response = await self.chatbot.agent.arun(message, stream=True)
+            async for chunk in run_response:
+                content = getattr(chunk, "content", None)
+                if content:
+                    yield content
+        except Exception as e:
+            logger.error("Error in %s streaming: %s", self.name, e)
+            yield self.error_message
+
+    async def cleanup(self) -> None:
+        """Clean up resources used by the agent."""
+        if self.chatbot:
+            try:
+                # Make sure cleanup is awaited
+                await self.chatbot.cleanup()
+            except Exception as e:
+                logger.error("Error cleaning up %s chatbot: %s", self.name, e)
+            finally:
+                self.chatbot = None
+        logger.info("%s cleaned up.", self.name)
@@ -5,19 +5,32 @@ This module handles the discovery, registration, and management of agents.
 It provides functions to list, get, and initialize agents.
 """
 
-import os
-import sys
+import asyncio
 import importlib
-import inspect
+import importlib.metadata
 import logging
-import traceback
-from typing import Dict, List, Type, Any, Optional
+from collections import defaultdict
+from typing import Dict, List, Tuple, Type, Any, Optional
+
+import orjson
 
 from .base_agent import BaseAgent
 
 # Setup logging with more detailed format
 logger = logging.getLogger("agent_registry")
 
+# Metadata keys exposed by the listing endpoints (mirrors routes.AgentMetadata)
+LISTING_FIELDS = ("id", "name", "description", "icon", "tags", "examplePrompts")
+_EMPTY_LISTING_JSON = orjson.dumps({"agents": [], "count": 0})
+
+# Built-in agents as (module, class name) pairs, modules relative to this package
+AGENT_CLASSES: Tuple[Tuple[str, str], ...] = (
+    (".persian_assistant", "PersianAssistant"),
+)
+
+# Entry-point group other installed packages can use to contribute agents
+ENTRY_POINT_GROUP = "ollama_desktop.agents"
+
 
 class AgentRegistry:
     """
@@ -28,99 +41,164 @@ class AgentRegistry:
         """Initialize the agent registry."""
         self._agents: Dict[str, BaseAgent] = {}
         self._initialized = False
+        # Agent metadata never changes after initialize(), so it is built once
+        self._metadata_cache: List[Dict[str, Any]] = []
+        self._list_response_json: bytes = b""
+        # Serialized AgentMetadata body for each agent, keyed by agent ID
+        self._agent_response_json: Dict[str, bytes] = {}
+        # Inverted tag -> metadata index plus serialized per-tag listings
+        self._metadata_by_tag: Dict[str, List[Dict[str, Any]]] = {}
+        self._tag_response_json: Dict[str, bytes] = {}
+        # Serializes discovery so concurrent callers never scan/import twice
+        self._init_lock = asyncio.Lock()
+
         
     async def initialize(self):
         """
-        Discover and initialize all agents in the agents directory.
+        Discover and initialize all configured agents.
+
+        Safe to call concurrently: discovery runs at most once, later callers
+        wait on the lock and return as soon as the first one finishes.
         """
         if self._initialized:
-            logger.info("Registry already initialized, skipping")
             return
-            
-        # Get the directory where agents are stored
-        agents_dir = os.path.dirname(os.path.abspath(__file__))
-        logger.info(f"Looking for agents in: {agents_dir}")
-        
-        # List all files in directory for debugging
-        all_files = os.listdir(agents_dir)
-        logger.info(f"Files in agents directory: {all_files}")
-        
-        # Get a list of all Python files in the agents directory
-        agent_files = [
-            f[:-3] for f in os.listdir(agents_dir) 
-            if f.endswith('.py') and 
-            f != '__init__.py' and 
-            f != 'base_agent.py' and
-            f != 'registry.py' and
-            f != 'routes.py'
-        ]
-        
-        logger.info(f"Discovered agent files: {agent_files}")
-        
-        # Import each agent module and find agent classes
-        for agent_file in agent_files:
+
+        async with self._init_lock:
+            if self._initialized:
+                logger.debug("Registry already initialized, skipping")
+                return
+            await self._discover_and_register()
+
+    async def _discover_and_register(self):
+        """Resolve the agent classes, then instantiate and register each agent."""
+        # Module imports are blocking (file I/O plus the global import lock),
+        # so keep them off the event loop.
+        agent_classes = await asyncio.to_thread(self._discover_agent_classes)
+
+        # Instantiation is cheap and synchronous; initialize() usually involves a
+        # round-trip to Ollama, so run all of them concurrently.
+        agents: List[Tuple[str, BaseAgent]] = []
+        for name, obj in agent_classes:
             try:
-                # Try to import the agent module via absolute or relative import
-                module_name_abs = f"api.agents.{agent_file}"
-                try:
-                    logger.info(f"Importing agent module via absolute import: {module_name_abs}")
-                    module = importlib.import_module(module_name_abs)
-                    logger.info(f"Successfully imported agent module: {module_name_abs}")
-                except ImportError as e_abs:
-                    logger.warning(f"Absolute import failed for {module_name_abs}: {e_abs}. Trying relative import.")
-                    # Fallback to relative import within this package
-                    module = importlib.import_module(f".{agent_file}", package=__package__)
-                    logger.info(f"Successfully imported agent module via relative import: {module.__name__}")
-                
-                # Find all classes in the module that inherit from BaseAgent
-                agent_classes = []
-                for name, obj in inspect.getmembers(module):
-                    if (inspect.isclass(obj) and 
-                        issubclass(obj, BaseAgent) and 
-                        obj is not BaseAgent):
-                        agent_classes.append((name, obj))
-                
-                logger.info(f"Found {len(agent_classes)} agent classes in {module.__name__}: {[name for name, _ in agent_classes]}")
-                
-                for name, obj in agent_classes:
-                    try:
-                        # Instantiate the agent
-                        logger.info(f"Instantiating agent class: {name}")
-                        agent = obj()
-                        
-                        # Initialize the agent
-                        logger.info(f"Initializing agent: {name} ({agent.agent_id})")
-                        success = await agent.initialize()
-                        
-                        if success:
-                            # Register the agent
-                            self._agents[agent.agent_id] = agent
-                            logger.info(f"Successfully registered agent: {agent.name} ({agent.agent_id})")
-                        else:
-                            logger.warning(f"Failed to initialize agent: {agent.name} - initialize() returned False")
-                    except Exception as e:
-                        logger.error(f"Error instantiating or initializing agent class {name}: {str(e)}")
-                        logger.error(traceback.format_exc())
-                            
-            except Exception as e:
-                logger.error(f"Error loading agent module {agent_file}: {str(e)}")
-                logger.error(traceback.format_exc())
-                
+                logger.debug("Instantiating agent class: %s", name)
+                agents.append((name, obj()))
+            except Exception:
+                logger.exception("Error instantiating agent class %s", name)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for name, agent in agents:
+                logger.debug("Initializing agent: %s (%s)", name, agent.agent_id)
+        results = await asyncio.gather(
+            *(agent.initialize() for _, agent in agents),
+            return_exceptions=True
+        )
+
+        # Register in discovery order so listings stay deterministic
+        for (name, agent), result in zip(agents, results):
+            if isinstance(result, BaseException):
+                logger.error("Error initializing agent class %s", name, exc_info=result)
+            elif result:
+                self._agents[agent.agent_id] = agent
+                logger.debug("Successfully registered agent: %s (%s)", agent.name, agent.agent_id)
+            else:
+                logger.warning("Failed to initialize agent: %s - initialize() returned False", agent.name)
+
+        self._build_metadata_cache()
         self._initialized = True
-        logger.info(f"Agent registry initialized with {len(self._agents)} agents")
+        logger.info("Agent registry initialized with %s agents", len(self._agents))
         if self._agents:
-            logger.info(f"Registered agents: {[agent.name for agent in self._agents.values()]}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Registered agents: %s", [agent.name for agent in self._agents.values()])
         else:
             logger.warning("No agents were successfully registered")
-    
+
+    def _discover_agent_classes(self) -> List[Tuple[str, Type[BaseAgent]]]:
+        """
+        Resolve the agent classes listed in AGENT_CLASSES and those exposed by
+        installed packages under the ENTRY_POINT_GROUP entry-point group.
+
+        This is fully synchronous and is meant to run in a worker thread.
+
+        Returns:
+            List of (class name, class) tuples
+        """
+        candidates: List[Tuple[str, Any]] = []
+
+        # Built-in agents: import only the modules that are listed
+        for module_name, class_name in AGENT_CLASSES:
+            try:
+                logger.debug("Importing agent class %s from %s", class_name, module_name)
+                module = importlib.import_module(module_name, package=__package__)
+                candidates.append((class_name, getattr(module, class_name)))
+            except Exception:
+                logger.exception("Error loading agent class %s from %s", class_name, module_name)
+
+        # Plugin agents shipped by other installed packages
+        for entry_point in importlib.metadata.entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                logger.debug("Loading agent entry point: %s (%s)", entry_point.name, entry_point.value)
+                candidates.append((entry_point.name, entry_point.load()))
+            except Exception:
+                logger.exception("Error loading agent entry point %s", entry_point.name)
+
+        discovered: List[Tuple[str, Type[BaseAgent]]] = []
+        for name, obj in candidates:
+            if isinstance(obj, type) and issubclass(obj, BaseAgent) and obj is not BaseAgent:
+                discovered.append((name, obj))
+            else:
+                logger.warning("Skipping %s: not a BaseAgent subclass", name)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Discovered agent classes: %s", [name for name, _ in discovered])
+        return discovered
+
+    def _build_metadata_cache(self):
+        """Snapshot agent metadata and the serialized listing response."""
+        self._metadata_cache = [agent.get_metadata() for agent in self._agents.values()]
+        self._list_response_json = self._serialize_listing(self._metadata_cache)
+        self._agent_response_json = {
+            metadata["id"]: orjson.dumps(self._project_listing_fields(metadata))
+            for metadata in self._metadata_cache
+        }
+
+        by_tag: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for metadata in self._metadata_cache:
+            # dict.fromkeys drops duplicate tags while keeping their order
+            for tag in dict.fromkeys(metadata["tags"]):
+                by_tag[tag].append(metadata)
+        self._metadata_by_tag = dict(by_tag)
+        self._tag_response_json = {
+            tag: self._serialize_listing(items) for tag, items in self._metadata_by_tag.items()
+        }
+
+    @staticmethod
+    def _project_listing_fields(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the fields exposed by the AgentMetadata response model."""
+        return {key: metadata.get(key) for key in LISTING_FIELDS}
+
+    @classmethod
+    def _serialize_listing(cls, metadata: List[Dict[str, Any]]) -> bytes:
+        """Serialize metadata dicts into an AgentListResponse JSON body."""
+        agents = [cls._project_listing_fields(item) for item in metadata]
+        return orjson.dumps({"agents": agents, "count": len(agents)})
+
     def get_all_agents(self) -> List[Dict[str, Any]]:
         """
         Get a list of all registered agents' metadata.
         
         Returns:
-            List of agent metadata dictionaries
+            List of agent metadata dictionaries (shared cache, do not mutate)
+        """
+        return self._metadata_cache
+
+    def get_all_agents_json(self) -> bytes:
+        """
+        Get the pre-serialized agent listing.
+
+        Returns:
+            JSON bytes shaped like AgentListResponse
         """
-        return [agent.get_metadata() for agent in self._agents.values()]
+        return self._list_response_json
     
     def get_agent(self, agent_id: str) -> Optional[BaseAgent]:
         """
@@ -133,6 +211,18 @@ class AgentRegistry:
             The agent instance or None if not found
         """
         return self._agents.get(agent_id)
+
+    def get_agent_json(self, agent_id: str) -> Optional[bytes]:
+        """
+        Get the pre-serialized metadata of an agent.
+
+        Args:
+            agent_id: The unique identifier of the agent
+
+        Returns:
+            JSON bytes shaped like AgentMetadata, or None if not found
+        """
+        return self._agent_response_json.get(agent_id)
     
     def get_agents_by_tag(self, tag: str) -> List[Dict[str, Any]]:
         """
@@ -144,21 +234,36 @@ class AgentRegistry:
         Returns:
             List of agent metadata dictionaries
         """
-        return [
-            agent.get_metadata() for agent in self._agents.values()
-            if tag in agent.tags
-        ]
+        return self._metadata_by_tag.get(tag, [])
+
+    def get_agents_by_tag_json(self, tag: str) -> bytes:
+        """
+        Get the serialized listing of agents with a specific tag.
+
+        Args:
+            tag: The tag to filter by
+
+        Returns:
+            JSON bytes shaped like AgentListResponse
+        """
+        return self._tag_response_json.get(tag, _EMPTY_LISTING_JSON)
     
     async def cleanup(self):
         """Clean up all agent resources."""
-        for agent in self._agents.values():
-            try:
-                await agent.cleanup()
-            except Exception as e:
-                logger.error(f"Error cleaning up agent {agent.name}: {str(e)}")
-        
-        self._agents = {}
-        self._initialized = False
+        async with self._init_lock:
+            for agent in self._agents.values():
+                try:
+                    await agent.cleanup()
+                except Exception as e:
+                    logger.error("Error cleaning up agent %s: %s", agent.name, e)
+            
+            self._agents = {}
+            self._metadata_cache = []
+            self._list_response_json = b""
+            self._agent_response_json = {}
+            self._metadata_by_tag = {}
+            self._tag_response_json = {}
+            self._initialized = False
 
 
 # Create a singleton instance of the registry
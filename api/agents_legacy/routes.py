@@ -4,25 +4,124 @@ Agent API Routes
 This module defines FastAPI routes for interacting with agents.
 """
 
-import json
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
+from api.sse import SSE_DONE, sse_event, sse_text
+
 from .registry import agent_registry
 
 
 # Setup logging
 logger = logging.getLogger("agent_routes")
 
-# Create a router for agent endpoints
+# Stream chunks are batched until this much text is buffered or the oldest
+# buffered chunk has waited this long, whichever comes first
+_COALESCE_MAX_CHARS = 256
+_COALESCE_MAX_DELAY = 0.008
+
+# How many chunks the agent may run ahead of a slow client, and the marker
+# the producer puts on the queue once the agent's stream is exhausted
+_STREAM_QUEUE_SIZE = 32
+_STREAM_END = object()
+
+
+async def _coalesce_chunks(chunks: AsyncIterator[str],
+                           max_chars: int = _COALESCE_MAX_CHARS,
+                           max_delay: float = _COALESCE_MAX_DELAY) -> AsyncIterator[str]:
+    """
+    Merge small stream chunks so each SSE event carries more text.
+
+    The pending __anext__ call is never cancelled on a flush timeout, so the
+    source generator is not interrupted mid-await.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    buffer: List[str] = []
+    buffered = 0
+    deadline = 0.0
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buffer)
+                buffer.clear()
+                buffered = 0
+                continue
+
+            finished, pending = pending, None
+            try:
+                chunk = finished.result()
+            except StopAsyncIteration:
+                break
+
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= max_chars:
+                yield "".join(buffer)
+                buffer.clear()
+                buffered = 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def _fill_queue(chunks: AsyncIterator[str], queue: asyncio.Queue) -> None:
+    """
+    Producer side of a stream: pump chunks into the queue.
+
+    Ends with _STREAM_END, or with the exception the source raised so the
+    consumer can re-raise it.
+    """
+    try:
+        async for chunk in chunks:
+            await queue.put(chunk)
+        await queue.put(_STREAM_END)
+    except Exception as e:
+        await queue.put(e)
+
+
+async def _drain_queue(queue: asyncio.Queue) -> AsyncIterator[str]:
+    """Consumer side of a stream filled by _fill_queue."""
+    while (item := await queue.get()) is not _STREAM_END:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+async def ensure_registry_initialized():
+    """
+    Lazy fallback for apps that include this router without warming the registry.
+
+    Once the registry is warm this is a single attribute check; the registry's
+    own lock guarantees discovery still only ever runs once.
+    """
+    await agent_registry.initialize()
+
+
+# Create a router for agent endpoints. The including app should call
+# agent_registry.initialize() and cleanup() from its lifespan; JSON bodies
+# that are not already pre-serialized are rendered with orjson.
 router = APIRouter(
     prefix="/agents",
     tags=["Agents"],
-    responses={404: {"description": "Not found"}}
+    responses={404: {"description": "Not found"}},
+    default_response_class=ORJSONResponse,
+    dependencies=[Depends(ensure_registry_initialized)]
 )
 
 
@@ -68,15 +167,10 @@ async def list_agents():
     Returns:
         A list of agent metadata
     """
-    # Ensure registry is initialized
-    if not agent_registry._initialized:
-        await agent_registry.initialize()
-    
-    agents_metadata = agent_registry.get_all_agents()
-    
-    return AgentListResponse(
-        agents=[AgentMetadata(**metadata) for metadata in agents_metadata],
-        count=len(agents_metadata)
+    # Metadata is immutable after startup, so serve the pre-serialized body
+    return Response(
+        content=agent_registry.get_all_agents_json(),
+        media_type="application/json"
     )
 
 
@@ -91,15 +185,11 @@ async def get_agent(agent_id: str):
     Returns:
         The agent's metadata
     """
-    # Ensure registry is initialized
-    if not agent_registry._initialized:
-        await agent_registry.initialize()
-    
-    agent = agent_registry.get_agent(agent_id)
-    if not agent:
+    payload = agent_registry.get_agent_json(agent_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail=f"Agent with ID {agent_id} not found")
     
-    return AgentMetadata(**agent.get_metadata())
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/tag/{tag}", response_model=AgentListResponse)
@@ -113,15 +203,9 @@ async def get_agents_by_tag(tag: str):
     Returns:
         A list of agent metadata
     """
-    # Ensure registry is initialized
-    if not agent_registry._initialized:
-        await agent_registry.initialize()
-    
-    agents_metadata = agent_registry.get_agents_by_tag(tag)
-    
-    return AgentListResponse(
-        agents=[AgentMetadata(**metadata) for metadata in agents_metadata],
-        count=len(agents_metadata)
+    return Response(
+        content=agent_registry.get_agents_by_tag_json(tag),
+        media_type="application/json"
     )
 
 
@@ -137,10 +221,6 @@ async def send_message_to_agent(agent_id: str, request: AgentMessageRequest):
     Returns:
         The agent's response
     """
-    # Ensure registry is initialized
-    if not agent_registry._initialized:
-        await agent_registry.initialize()
-    
     agent = agent_registry.get_agent(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail=f"Agent with ID {agent_id} not found")
@@ -158,7 +238,7 @@ async def send_message_to_agent(agent_id: str, request: AgentMessageRequest):
             session_id=request.session_id
         )
     except Exception as e:
-        logger.error(f"Error processing message with agent {agent_id}: {str(e)}")
+        logger.error("Error processing message with agent %s: %s", agent_id, e)
         raise HTTPException(
             status_code=500, 
             detail=f"Error processing message: {str(e)}"
@@ -177,28 +257,31 @@ async def stream_message_to_agent(agent_id: str, request: AgentMessageRequest):
     Returns:
         A streaming response of the agent's reply
     """
-    # Ensure registry is initialized
-    if not agent_registry._initialized:
-        await agent_registry.initialize()
-    
     agent = agent_registry.get_agent(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail=f"Agent with ID {agent_id} not found")
     
     async def generate_stream():
+        # The agent fills a bounded queue from its own task, so generation keeps
+        # going while a slow client drains earlier chunks
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_STREAM_QUEUE_SIZE)
+        producer = asyncio.create_task(_fill_queue(agent.process_stream(
+            message=request.message,
+            session_id=request.session_id,
+            context=request.context
+        ), queue))
         try:
-            async for chunk in agent.process_stream(
-                message=request.message,
-                session_id=request.session_id,
-                context=request.context
-            ):
-                yield f"data: {json.dumps({'text': chunk})}\n\n"
+            async for chunk in _coalesce_chunks(_drain_queue(queue)):
+                yield sse_text(chunk)
             
             # Signal completion
-            yield f"data: {json.dumps({'done': True})}\n\n"
+            yield SSE_DONE
         except Exception as e:
-            logger.error(f"Error streaming message with agent {agent_id}: {str(e)}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            logger.error("Error streaming message with agent %s: %s", agent_id, e)
+            yield sse_event({"error": str(e)})
+        finally:
+            # Stop the agent if the client went away before the stream finished
+            producer.cancel()
     
     return StreamingResponse(
         generate_stream(),
@@ -0,0 +1,88 @@
+"""
+Helpers for bridging blocking code to asyncio.
+
+Both the server's streaming endpoints and the legacy agents use these to
+consume a blocking producer from a single worker thread, instead of
+dispatching every step to the thread pool.
+"""
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Callable, Iterable
+
+# Marks the end of a thread-produced stream in stream_from_thread's queue
+_STREAM_END = object()
+
+
+async def stream_from_thread(produce: Callable[[Callable[[Any], None]], None],
+                             maxsize: int = 64) -> AsyncIterator[Any]:
+    """
+    Bridge a blocking, callback-based producer to an async stream.
+
+    ``produce`` runs in a worker thread and is called with an ``emit``
+    function; every item passed to ``emit`` is handed to the loop with a
+    single call_soon_threadsafe, and the thread blocks only when the
+    consumer is ``maxsize`` items behind. If the consumer stops early, the
+    next ``emit`` call raises RuntimeError so the producer can unwind.
+
+    Args:
+        produce: Blocking function that calls ``emit(item)`` for each item
+        maxsize: Maximum number of items buffered between thread and loop
+
+    Returns:
+        An async generator yielding the produced items; an exception raised
+        by ``produce`` is re-raised here
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    # Free buffer slots, released by the consumer as it takes items; bounds
+    # the queue without a loop round-trip per item
+    slots = threading.Semaphore(maxsize)
+    closed = False
+
+    def emit(item: Any) -> None:
+        slots.acquire()
+        if closed:
+            raise RuntimeError("Stream consumer has gone away.")
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    async def run_producer():
+        try:
+            await asyncio.to_thread(produce, emit)
+            await queue.put(_STREAM_END)
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.create_task(run_producer())
+    try:
+        while (item := await queue.get()) is not _STREAM_END:
+            slots.release()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        closed = True
+        # Wake a producer thread waiting for a free slot so it can exit
+        slots.release()
+        producer.cancel()
+
+
+def iterate_in_thread(make_iterator: Callable[[], Iterable[Any]],
+                      maxsize: int = 64) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator from one dedicated worker thread.
+
+    StreamingResponse runs a plain iterator by dispatching every next() call
+    to the thread pool; this drains it from a single thread instead.
+
+    Args:
+        make_iterator: Callable returning the blocking iterable to consume
+        maxsize: Maximum number of items buffered between thread and loop
+
+    Returns:
+        An async generator yielding the iterator's items
+    """
+    def produce(emit: Callable[[Any], None]) -> None:
+        for item in make_iterator():
+            emit(item)
+
+    return stream_from_thread(produce, maxsize)
@@ -1,7 +1,22 @@
+import copy
 import json
 import os
 import platform
 
+from api.logger import app_logger
+
+# Last parsed config and the file state (mtime and size) it was read from;
+# agents read the config each time they are created, so unchanged files skip
+# the disk I/O. write_ollama_config refreshes it directly, since a rewrite can
+# land within the same mtime tick (about 15 ms on NTFS).
+_config_cache = {"path": None, "stat": None, "data": None}
+
+
+def _file_state(path):
+    """Return the (mtime, size) pair used to tell whether a file changed."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
 def read_ollama_config():
     """
     Read the ollama_desktop_config.json file from the appropriate location
@@ -21,12 +36,12 @@ def read_ollama_config():
         config_path = os.path.join(os.environ.get("APPDATA"), "ollama_desktop", "ollama_desktop_config.json")
         config_dir = os.path.join(os.environ.get("APPDATA"), "ollama_desktop")
     else:  # Linux or other
-        print(f"Unsupported operating system: {system}")
+        app_logger.warning(f"Unsupported operating system: {system}")
         return None
     
     # Check if the file exists
     if not os.path.exists(config_path):
-        print(f"Config file not found at: {config_path}")
+        app_logger.info(f"Config file not found at: {config_path}")
         # Create a default configuration file
         default_config = {
             "settings": {
@@ -86,26 +101,33 @@ def read_ollama_config():
             try:
                 os.makedirs(config_dir)
             except Exception as e:
-                print(f"Error creating directory: {e}")
+                app_logger.error(f"Error creating directory: {e}")
                 return None
         
         # Write the default configuration
         try:
             with open(config_path, 'w') as file:
                 json.dump(default_config, file, indent=2)
-            print(f"Created default configuration file at: {config_path}")
+            app_logger.info(f"Created default configuration file at: {config_path}")
             return default_config
         except Exception as e:
-            print(f"Error creating default config file: {e}")
+            app_logger.error(f"Error creating default config file: {e}")
             return None
     
     # Read and parse the JSON file
     try:
+        state = _file_state(config_path)
+        if _config_cache["path"] == config_path and _config_cache["stat"] == state:
+            # Callers modify the returned dict, so hand out a copy
+            return copy.deepcopy(_config_cache["data"])
+
         with open(config_path, 'r') as file:
             config_data = json.load(file)
         
         # Ensure backward compatibility and add missing sections
+        migrated = False
         if "systemPrompts" not in config_data:
+            migrated = True
             config_data["systemPrompts"] = {
                 "default": {
                     "name": "Default Assistant",
@@ -124,17 +146,19 @@ def read_ollama_config():
             }
         
         if "activeSystemPrompt" not in config_data:
+            migrated = True
             config_data["activeSystemPrompt"] = "default"
         
-        # Save the updated config
-        write_ollama_config(config_data)
-        
+        # Save the updated config, only if a section had to be added; a
+        # successful write refreshes the cache itself
+        if not (migrated and write_ollama_config(config_data)):
+            _config_cache.update(path=config_path, stat=state, data=copy.deepcopy(config_data))
         return config_data
     except json.JSONDecodeError:
-        print("Error: Invalid JSON format in config file")
+        app_logger.error("Invalid JSON format in config file")
         return None
     except Exception as e:
-        print(f"Error reading config file: {e}")
+        app_logger.error(f"Error reading config file: {e}")
         return None
 
 def write_ollama_config(config_data):
@@ -159,7 +183,7 @@ def write_ollama_config(config_data):
         config_path = os.path.join(os.environ.get("APPDATA"), "ollama_desktop", "ollama_desktop_config.json")
         config_dir = os.path.join(os.environ.get("APPDATA"), "ollama_desktop")
     else:  # Linux or other
-        print(f"Unsupported operating system: {system}")
+        app_logger.warning(f"Unsupported operating system: {system}")
         return False
     
     # Create directory if it doesn't exist
@@ -167,16 +191,19 @@ def write_ollama_config(config_data):
         try:
             os.makedirs(config_dir)
         except Exception as e:
-            print(f"Error creating directory: {e}")
+            app_logger.error(f"Error creating directory: {e}")
             return False
     
     # Write the JSON file
     try:
         with open(config_path, 'w') as file:
             json.dump(config_data, file, indent=2)
+        _config_cache.update(path=config_path, stat=_file_state(config_path),
+                             data=copy.deepcopy(config_data))
         return True
     except Exception as e:
-        print(f"Error writing config file: {e}")
+        _config_cache.update(path=None, stat=None, data=None)
+        app_logger.error(f"Error writing config file: {e}")
         return False
 
 def get_active_system_prompt():
@@ -211,7 +238,7 @@ def set_active_system_prompt(prompt_id):
     
     # Check if the prompt exists
     if prompt_id not in config.get("systemPrompts", {}):
-        print(f"System prompt '{prompt_id}' not found")
+        app_logger.warning(f"System prompt '{prompt_id}' not found")
         return False
     
     config["activeSystemPrompt"] = prompt_id
@@ -254,12 +281,12 @@ def delete_system_prompt(prompt_id):
     
     # Don't allow deletion of the default prompt
     if prompt_id == "default":
-        print("Cannot delete the default system prompt")
+        app_logger.warning("Cannot delete the default system prompt")
         return False
     
     system_prompts = config.get("systemPrompts", {})
     if prompt_id not in system_prompts:
-        print(f"System prompt '{prompt_id}' not found")
+        app_logger.warning(f"System prompt '{prompt_id}' not found")
         return False
     
     del system_prompts[prompt_id]
@@ -352,6 +352,20 @@ async def add_chat_message(session_id: str, role: str, message: str) -> None:
         )
         conn.commit()
 
+async def add_chat_message_and_touch_session(session_id: str, role: str, message: str) -> None:
+    """Add a message and update the session's last_active timestamp in one transaction"""
+    async with async_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO chat_history (session_id, role, message) VALUES (?, ?, ?)",
+            (session_id, role, message)
+        )
+        cursor.execute(
+            "UPDATE sessions SET last_active = CURRENT_TIMESTAMP WHERE session_id = ?",
+            (session_id,)
+        )
+        conn.commit()
+
 async def get_chat_history(session_id: str, limit: int = 100) -> List[Dict]:
     """Get chat history for a session"""
     async with async_db_connection() as conn:
@@ -210,6 +210,9 @@ class Logger:
 
     @handle_recursion
     def debug(self, message, exc_info=True):
+        # Debug is off in production: skip the caller lookup and formatting
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         try:
             filename, func_name = self._get_caller_info()
             self.logger.debug(f"[{filename}:{func_name}] {message}")
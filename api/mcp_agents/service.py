@@ -22,9 +22,14 @@ from .models import (
     MCPServerTemplate, AgentTemplate
 )
 from api.logger import app_logger
+from api.sse import SSE_DONE, sse_event, sse_words
 
 logger = logging.getLogger("mcp_agent_service")
 
+# How long stop/update/delete wait for an agent's MCP servers to shut down
+# before letting the cleanup finish in the background
+CLEANUP_WAIT_SECONDS = 2.0
+
 
 class MCPAgentService:
     """Enhanced service for managing agents using Ollama models with latest Agno MCP features"""
@@ -32,6 +37,8 @@ class MCPAgentService:
     def __init__(self, db_path: str = "api/mcp_agents.db"):
         self.db_path = db_path
         self.active_agents: Dict[str, OllamaMCPAgent] = {}
+        # Cleanups that outlived CLEANUP_WAIT_SECONDS, kept referenced until done
+        self._cleanup_tasks = set()
         self._init_database()
         
         # Remove automatic sample creation - handle via API endpoints instead
@@ -518,70 +525,76 @@ class MCPAgentService:
         try:
             agent = await self.start_agent(agent_id)
             if not agent:
-                yield f"data: {json.dumps({'error': 'Could not start the agent'})}\n\n"
+                yield sse_event({'error': 'Could not start the agent'})
                 return
             
-            # Use the agent's streaming capabilities
-            response_buffer = []
+            # Use the agent's streaming capabilities; chunks are forwarded as
+            # they arrive and nothing here needs the full reply, so it is not kept
             try:
-                if hasattr(agent.agent, 'run') and callable(agent.agent.run):
-                    # Try Agno's native streaming
-                    run_response = agent.agent.run(message, stream=True)
+                if hasattr(agent.agent, 'arun') and callable(agent.agent.arun):
+                    # Try Agno's native async streaming
+                    run_response = await agent.agent.arun(message, stream=True)
                     
-                    for chunk in run_response:
+                    async for chunk in run_response:
                         if hasattr(chunk, 'content') and chunk.content:
                             content = chunk.content
-                            response_buffer.append(content)
                             
-                            # Stream content word by word for better UX
-                            import re
-                            parts = re.findall(r'\S+|\s+', content)
-                            for part in parts:
-                                yield f"data: {json.dumps({'text': part})}\n\n"
-                                await asyncio.sleep(0.02)
+                            # Stream content word by word for better UX; native chunks already
+                            # arrive at generation pace, so no extra delay is added
+                            for event in sse_words(content):
+                                yield event
                 else:
                     # Fallback to regular chat
                     response = await agent.chat(message)
-                    response_buffer.append(response)
                     
                     # Stream word by word
-                    import re
-                    parts = re.findall(r'\S+|\s+', response)
-                    for part in parts:
-                        yield f"data: {json.dumps({'text': part})}\n\n"
+                    for event in sse_words(response):
+                        yield event
                         await asyncio.sleep(0.03)
                 
                 # Send completion signal
-                yield f"data: {json.dumps({'done': True})}\n\n"
+                yield SSE_DONE
                 
             except Exception as stream_error:
                 app_logger.error(f"Streaming error for agent {agent_id}: {stream_error}")
-                yield f"data: {json.dumps({'error': str(stream_error)})}\n\n"
+                yield sse_event({'error': str(stream_error)})
             
         except Exception as e:
             app_logger.error(f"Error streaming with agent {agent_id}: {str(e)}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield sse_event({'error': str(e)})
     
     async def _cleanup_agent(self, agent_id: str):
-        """Clean up an agent's resources"""
+        """
+        Clean up an agent's resources.
+
+        The agent is detached right away, so the next request starts a fresh
+        one. A stuck MCP server only delays the caller by CLEANUP_WAIT_SECONDS;
+        after that its shutdown carries on in the background.
+        """
+        agent = self.active_agents.pop(agent_id, None)
+        if agent is None:
+            return
+
+        # Clean up MCP connections properly
+        task = asyncio.create_task(agent.cleanup())
         try:
-            if agent_id in self.active_agents:
-                agent = self.active_agents[agent_id]
-                # Clean up MCP connections properly
-                await agent.cleanup()
-                del self.active_agents[agent_id]
-                app_logger.info(f"Cleaned up agent: {agent_id}")
+            await asyncio.wait_for(asyncio.shield(task), timeout=CLEANUP_WAIT_SECONDS)
+            app_logger.info(f"Cleaned up agent: {agent_id}")
+        except asyncio.TimeoutError:
+            app_logger.warning(f"Cleanup of agent {agent_id} is slow, finishing it in the background")
+            self._cleanup_tasks.add(task)
+            task.add_done_callback(self._cleanup_tasks.discard)
         except Exception as e:
             app_logger.warning(f"Error cleaning up agent {agent_id}: {e}")
-            # Remove from active agents even if cleanup failed
-            if agent_id in self.active_agents:
-                del self.active_agents[agent_id]
     
     async def cleanup_all_agents(self):
         """Clean up all active agents"""
         agents_to_cleanup = list(self.active_agents.keys())
         for agent_id in agents_to_cleanup:
             await self._cleanup_agent(agent_id)
+        # On shutdown, let slow cleanups finish rather than abandoning them
+        if self._cleanup_tasks:
+            await asyncio.gather(*self._cleanup_tasks, return_exceptions=True)
         app_logger.info("All agents cleaned up")
     
     async def get_available_models(self) -> List[str]:
@@ -1,8 +1,15 @@
 import sys
 import os
+import re
+import base64
 import inspect
 import asyncio
-from typing import Optional, List, Dict, Any, Union
+import concurrent.futures
+import contextlib
+import logging
+import time
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, Union
 from pathlib import Path
 
 # Determine the absolute path of the current script
@@ -25,6 +32,18 @@ from agno.agent import Agent
 from agno.models.openai.like import OpenAILike
 from agno.tools import tool
 
+# The ollama client is only needed for pulling models
+try:
+    import ollama
+except ImportError:
+    ollama = None
+
+# asyncio.timeout is only available from Python 3.11
+if sys.version_info >= (3, 11):
+    from asyncio import timeout as async_timeout
+else:
+    from async_timeout import timeout as async_timeout
+
 # Import MCP support from Agno
 try:
     from agno.tools.mcp import MCPTools, MultiMCPTools
@@ -40,9 +59,62 @@ from api.config_io import read_ollama_config, get_active_system_prompt
 
 # Import embedding models scraper function
 from api.scrape_ollama import fetch_embedding_models
+from api.pdf_text import extract_pdf_text, content_digest
 
 load_dotenv()  # load environment variables from .env
 
+# Upper bound on connecting to the configured MCP servers; a server that hangs
+# during its handshake falls back to the basic agent instead of blocking forever.
+# Generous because stdio servers started through uvx/npx may install on first run.
+MCP_CONNECT_TIMEOUT = 60.0
+
+# OpenAI-compatible clients shared by every agent, keyed by Ollama base URL.
+# Each client owns an HTTP connection pool, so reusing it keeps connections alive
+# across requests and agents instead of handshaking on every call.
+_shared_openai_clients: Dict[str, Any] = {}
+
+
+def get_shared_openai_client(base_url: str):
+    """
+    Get the shared AsyncOpenAI client for an Ollama server.
+
+    Args:
+        base_url: Base URL of the Ollama server (without the /v1 suffix)
+
+    Returns:
+        AsyncOpenAI: Client pointed at the server's OpenAI-compatible API
+    """
+    client = _shared_openai_clients.get(base_url)
+    if client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(base_url=f"{base_url}/v1", api_key="ollama")
+        _shared_openai_clients[base_url] = client
+    return client
+
+
+# Recently fetched model lists, keyed by Ollama base URL, with the monotonic
+# time they were fetched. The model picker, /available-models and the MCP
+# service all ask for the list, often several times in a row.
+MODEL_LIST_TTL_SECONDS = 30.0
+_model_list_cache: Dict[str, Tuple[float, List[str]]] = {}
+
+
+async def close_shared_clients():
+    """Close every shared client and its connection pool (call on shutdown)."""
+    clients = list(_shared_openai_clients.values())
+    _shared_openai_clients.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception as e:
+            app_logger.warning(f"Error closing shared Ollama client: {e}")
+
+
+def _extract_pdf_with_settings(data: bytes) -> str:
+    """Extract PDF text, using the disk cache only if the user opted in."""
+    config = read_ollama_config() or {}
+    return extract_pdf_text(data, disk_cache=config.get("cache_pdf_text", False))
+
 
 class OllamaMCPAgent:
     """
@@ -102,30 +174,28 @@ class OllamaMCPAgent:
         if self.base_url.endswith('/v1'):
             self.base_url = self.base_url.rstrip('/v1')
 
-        # Initialize Ollama model for chat
+        # Initialize Ollama model for chat; async runs go through the shared
+        # client so every agent and turn reuses its keep-alive connections
         self.model = OpenAILike(
             id=self.model_name,
             api_key="ollama",  # Required but unused by Ollama
             base_url=f"{self.base_url}/v1",
             temperature=self.temperature,
             top_p=self.top_p,
+            async_client=get_shared_openai_client(self.base_url),
         )
 
-        # Initialize vision model if different
-        self.vision_model = None
-        if self.vision_model_name and self.vision_model_name != self.model_name:
-            self.vision_model = OpenAILike(
-                id=self.vision_model_name,
-                api_key="ollama",
-                base_url=f"{self.base_url}/v1",
-                temperature=self.temperature,
-                top_p=self.top_p,
-            )
+        # Vision model is created on first use (see the vision_model property);
+        # most sessions never send an image
+        self._vision_model = None
 
         # MCP tools context manager
         self.mcp_tools = None
         self.agent = None
 
+        # Digests of the files already added as context, to skip re-uploads
+        self._context_digests = set()
+
         if self.verbose:
             app_logger.info(f"Initialized Ollama MCP Agent with model: {self.model_name}")
             app_logger.info(f"Base URL: {self.base_url}")
@@ -134,6 +204,29 @@ class OllamaMCPAgent:
             if self.mcp_urls:
                 app_logger.info(f"MCP URLs configured: {self.mcp_urls}")
 
+    @property
+    def vision_model(self) -> Optional[OpenAILike]:
+        """Ollama vision model, or None if no separate vision model is configured."""
+        if self._vision_model is None and self.vision_model_name and self.vision_model_name != self.model_name:
+            self._vision_model = OpenAILike(
+                id=self.vision_model_name,
+                api_key="ollama",
+                base_url=f"{self.base_url}/v1",
+                temperature=self.temperature,
+                top_p=self.top_p,
+                async_client=get_shared_openai_client(self.base_url),
+            )
+        return self._vision_model
+
+    def _agno_debug_mode(self) -> bool:
+        """
+        Whether agno should log its per-run trace.
+
+        agno's debug mode dumps every message, tool call and metric on every
+        turn, so verbose agents only enable it when DEBUG logging is on.
+        """
+        return self.verbose and app_logger.logger.isEnabledFor(logging.DEBUG)
+
     async def initialize_mcp(self):
         """Initialize MCP connections and create the agent."""
         if not MCP_AVAILABLE:
@@ -144,43 +237,53 @@ class OllamaMCPAgent:
 
         # Initialize MCP tools if any MCP servers are configured
         if self.mcp_commands or self.mcp_urls:
+            mcp_tools = None
             try:
                 if len(self.mcp_commands) + len(self.mcp_urls) > 1:
                     # Use MultiMCPTools for multiple servers
-                    self.mcp_tools = await MultiMCPTools(
+                    mcp_tools = MultiMCPTools(
                         commands=self.mcp_commands if self.mcp_commands else None,
                         urls=self.mcp_urls if self.mcp_urls else None,
                         env=self.mcp_env if self.mcp_env else None,
-                    ).__aenter__()
-                    tools.append(self.mcp_tools)
-                    
-                    if self.verbose:
-                        app_logger.info(f"Connected to {len(self.mcp_commands) + len(self.mcp_urls)} MCP servers")
-                        
+                    )
+                    connected_message = f"Connected to {len(self.mcp_commands) + len(self.mcp_urls)} MCP servers"
                 elif self.mcp_commands:
                     # Single command server
-                    self.mcp_tools = await MCPTools(
+                    mcp_tools = MCPTools(
                         command=self.mcp_commands[0],
                         env=self.mcp_env if self.mcp_env else None,
-                    ).__aenter__()
-                    tools.append(self.mcp_tools)
-                    
-                    if self.verbose:
-                        app_logger.info(f"Connected to MCP server: {self.mcp_commands[0]}")
-                        
-                elif self.mcp_urls:
+                    )
+                    connected_message = f"Connected to MCP server: {self.mcp_commands[0]}"
+                else:
                     # Single URL server
-                    self.mcp_tools = await MCPTools(
+                    mcp_tools = MCPTools(
                         url=self.mcp_urls[0],
                         env=self.mcp_env if self.mcp_env else None,
-                    ).__aenter__()
-                    tools.append(self.mcp_tools)
-                    
-                    if self.verbose:
-                        app_logger.info(f"Connected to MCP server: {self.mcp_urls[0]}")
+                    )
+                    connected_message = f"Connected to MCP server: {self.mcp_urls[0]}"
+
+                # A timeout scope (unlike wait_for) runs the handshake in this task,
+                # so whatever the MCP clients start is not tied to a wrapper task
+                async with async_timeout(MCP_CONNECT_TIMEOUT):
+                    self.mcp_tools = await mcp_tools.__aenter__()
+                tools.append(self.mcp_tools)
+
+                if self.verbose:
+                    app_logger.info(connected_message)
 
             except Exception as e:
-                app_logger.error(f"Failed to initialize MCP tools: {e}")
+                # async_timeout raises asyncio.TimeoutError, which is only an
+                # alias of the builtin TimeoutError from Python 3.11
+                if isinstance(e, asyncio.TimeoutError):
+                    app_logger.error(f"Timed out after {MCP_CONNECT_TIMEOUT:.0f}s connecting to MCP servers")
+                else:
+                    app_logger.error(f"Failed to initialize MCP tools: {e}")
+                # A half-entered client may already have spawned a server
+                # process or opened a transport; close it before giving up
+                if mcp_tools is not None:
+                    with contextlib.suppress(Exception):
+                        await mcp_tools.__aexit__(None, None, None)
+                self.mcp_tools = None
                 # Fall back to basic agent without MCP
                 return await self._create_basic_agent()
 
@@ -190,7 +293,8 @@ class OllamaMCPAgent:
         # Get system prompt configuration
         prompt_config = self._get_system_prompt_config()
 
-        # Initialize the Agno agent with MCP tools
+        # Initialize the Agno agent with MCP tools; it starts without file context
+        self._context_digests.clear()
         self.agent = Agent(
             model=self.model,
             user_id=self.user_id,
@@ -202,7 +306,7 @@ class OllamaMCPAgent:
             markdown=prompt_config.get("markdown", True),
             add_datetime_to_instructions=prompt_config.get("add_datetime_to_instructions", False),
             show_tool_calls=self.verbose,
-            debug_mode=self.verbose,
+            debug_mode=self._agno_debug_mode(),
             tools=tools,
         )
 
@@ -216,7 +320,8 @@ class OllamaMCPAgent:
         # Get system prompt configuration
         prompt_config = self._get_system_prompt_config()
 
-        # Initialize the Agno agent with basic tools only
+        # Initialize the Agno agent with basic tools only; it starts without file context
+        self._context_digests.clear()
         self.agent = Agent(
             model=self.model,
             user_id=self.user_id,
@@ -228,7 +333,7 @@ class OllamaMCPAgent:
             markdown=prompt_config.get("markdown", True),
             add_datetime_to_instructions=prompt_config.get("add_datetime_to_instructions", False),
             show_tool_calls=self.verbose,
-            debug_mode=self.verbose,
+            debug_mode=self._agno_debug_mode(),
             tools=[get_current_time, calculate],
         )
 
@@ -298,6 +403,8 @@ class OllamaMCPAgent:
         self.agent.description = prompt_config.get("description", "")
         self.agent.instructions = prompt_config.get("instructions", [])
         self.agent.additional_context = prompt_config.get("additional_context", "")
+        # Files added earlier were dropped along with the old context
+        self._context_digests.clear()
         self.agent.expected_output = prompt_config.get("expected_output", "")
         self.agent.markdown = prompt_config.get("markdown", True)
         self.agent.add_datetime_to_instructions = prompt_config.get("add_datetime_to_instructions", False)
@@ -342,31 +449,61 @@ class OllamaMCPAgent:
         Args:
             file_path: Path to the uploaded file
             file_name: Original name of the file (used for metadata)
+
+        Returns:
+            True if the file was added, False if it was skipped
         """
         if not self.agent:
             app_logger.warning("Agent not initialized, cannot add file context")
-            return
+            return False
 
         file_path = Path(file_path)
         if not file_path.exists():
             raise FileNotFoundError(f"File not found at {file_path}")
 
-        app_logger.info(f"Processing file for context: {file_name} ({file_path.suffix})")
+        data = await asyncio.to_thread(file_path.read_bytes)
+        return await self.add_file_content(data, file_name)
+
+    async def add_file_content(self, data: bytes, file_name: str):
+        """
+        Add file context to the agent from the raw bytes of a file.
+
+        Lets callers that already hold the file in memory (e.g. an upload) skip
+        writing it to disk just to have it read back.
+
+        Args:
+            data: Raw file contents
+            file_name: Original name of the file (its extension selects the parser)
+
+        Returns:
+            True if the file was added, False if it was skipped because the agent
+            is not initialized or the same content is already in its context
+        """
+        if not self.agent:
+            app_logger.warning("Agent not initialized, cannot add file context")
+            return False
+
+        digest = content_digest(data)
+        if digest in self._context_digests:
+            app_logger.info(f"Skipping {file_name}: the same content is already in the agent's context")
+            return False
+
+        suffix = Path(file_name).suffix.lower()
+        app_logger.info(f"Processing file for context: {file_name} ({suffix})")
 
         try:
             text_content = ""
-            if file_path.suffix == '.pdf':
-                # Simple PDF reading without complex dependencies
+            if suffix == '.pdf':
+                # Extraction is CPU-bound: keep it off the event loop, and large
+                # PDFs are further split across worker processes
                 try:
-                    import pypdf
-                    reader = pypdf.PdfReader(file_path)
-                    text_content = "".join(page.extract_text() for page in reader.pages if page.extract_text())
+                    text_content = await asyncio.to_thread(_extract_pdf_with_settings, data)
                 except ImportError:
                     raise ImportError("pypdf is required for PDF processing. Install with: pip install pypdf")
-            elif file_path.suffix in ['.txt', '.md']:
-                text_content = file_path.read_text(encoding='utf-8')
+            elif suffix in ['.txt', '.md']:
+                text_content = data.decode('utf-8')
             else:
-                raise ValueError(f"Unsupported file type: {file_path.suffix}")
+                raise ValueError(f"Unsupported file type: {suffix}")
 
             if not text_content.strip():
                 raise ValueError(f"No text could be extracted from file: {file_name}")
@@ -377,8 +514,10 @@ class OllamaMCPAgent:
             # Update the additional_context of the agent
             current_context = self.agent.additional_context or ""
             self.agent.additional_context = current_context + context_text
+            self._context_digests.add(digest)
 
             app_logger.info(f"Successfully added context from {file_name} to agent.")
+            return True
 
         except Exception as e:
             app_logger.error(f"Error processing file {file_name}: {str(e)}", exc_info=True)
@@ -428,7 +567,6 @@ class OllamaMCPAgent:
                 loop = asyncio.get_event_loop()
                 if loop.is_running():
                     # Create new task if loop is already running
-                    import concurrent.futures
                     with concurrent.futures.ThreadPoolExecutor() as executor:
                         future = executor.submit(asyncio.run, self.initialize_mcp())
                         future.result()
@@ -460,7 +598,6 @@ class OllamaMCPAgent:
                 # Initialize if needed
                 loop = asyncio.get_event_loop()
                 if loop.is_running():
-                    import concurrent.futures
                     with concurrent.futures.ThreadPoolExecutor() as executor:
                         future = executor.submit(asyncio.run, self.initialize_mcp())
                         future.result()
@@ -474,9 +611,7 @@ class OllamaMCPAgent:
             self.agent.print_response(message, stream=True, **kwargs)
 
         except Exception as e:
-            error_msg = f"Error during chat streaming: {e}"
-            app_logger.error(error_msg, exc_info=True)
-            print(error_msg)
+            app_logger.error(f"Error during chat streaming: {e}", exc_info=True)
 
     async def chat_with_image(self, message: str, image_paths: List[Union[str, Path]], **kwargs) -> str:
         """
@@ -495,13 +630,7 @@ class OllamaMCPAgent:
 
         try:
             # For vision, we'll use the vision model directly
-            from openai import AsyncOpenAI
-            import base64
-
-            client = AsyncOpenAI(
-                base_url=f"{self.base_url}/v1",
-                api_key="ollama",
-            )
+            client = get_shared_openai_client(self.base_url)
 
             # Prepare image content
             content = [{"type": "text", "text": message}]
@@ -557,6 +686,7 @@ class OllamaMCPAgent:
             # Clear agent reference
             if self.agent:
                 self.agent = None
+            self._context_digests.clear()
                 
             if self.verbose:
                 app_logger.info("Ollama MCP Agent cleanup completed")
@@ -648,38 +778,74 @@ class OllamaPackage:
 
     @staticmethod
     async def get_available_models(base_url: Optional[str] = None) -> List[str]:
-        """Get a list of available Ollama models."""
+        """
+        Get a list of available Ollama models.
+
+        Lists are reused for MODEL_LIST_TTL_SECONDS; call invalidate_model_list
+        after the installed models change.
+        """
         base_url = base_url or os.getenv("OLLAMA_HOST", "http://localhost:11434")
+        cached = _model_list_cache.get(base_url)
+        if cached and time.monotonic() - cached[0] < MODEL_LIST_TTL_SECONDS:
+            return list(cached[1])
         try:
-            from openai import AsyncOpenAI
-            client = AsyncOpenAI(base_url=f"{base_url}/v1", api_key="ollama")
+            client = get_shared_openai_client(base_url)
             models_response = await client.models.list()
-            return [model.id for model in models_response.data]
+            models = [model.id for model in models_response.data]
+            _model_list_cache[base_url] = (time.monotonic(), models)
+            return list(models)
         except Exception as e:
             app_logger.error(f"Error getting available models: {e}")
             return []
 
+    @staticmethod
+    def invalidate_model_list():
+        """Forget the cached model lists, e.g. after a model was pulled."""
+        _model_list_cache.clear()
+
     @staticmethod
     async def get_model_info(model_name: str, base_url: Optional[str] = None) -> Dict[str, Any]:
         """Get information about an Ollama model."""
         base_url = base_url or os.getenv("OLLAMA_HOST", "http://localhost:11434")
         try:
-            from openai import AsyncOpenAI
-            client = AsyncOpenAI(base_url=f"{base_url}/v1", api_key="ollama")
+            client = get_shared_openai_client(base_url)
             model_info = await client.models.retrieve(model_name)
             return model_info.model_dump()
         except Exception as e:
             app_logger.error(f"Error getting model info for '{model_name}': {e}")
             return {}
 
+    @staticmethod
+    async def list_models_with_info(base_url: Optional[str] = None, max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Get every available model together with its info.
+
+        The per-model lookups run concurrently (at most max_concurrency at a
+        time) instead of one round-trip after another.
+
+        Args:
+            base_url: Base URL of the Ollama server
+            max_concurrency: Maximum number of info requests in flight
+
+        Returns:
+            One info dict per model, in the order Ollama lists them; models
+            whose info could not be retrieved only carry their id
+        """
+        model_names = await OllamaPackage.get_available_models(base_url)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch_info(model_name: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await OllamaPackage.get_model_info(model_name, base_url) or {"id": model_name}
+
+        return list(await asyncio.gather(*(fetch_info(name) for name in model_names)))
+
     @staticmethod
     def pull_model(model_name: str, stream: bool = True) -> Any:
         """Pull an Ollama model."""
-        try:
-            import ollama
-            return ollama.pull(model_name, stream=stream)
-        except ImportError:
+        if ollama is None:
             raise ImportError("ollama library required for model pulling")
+        return ollama.pull(model_name, stream=stream)
 
     @staticmethod
     async def get_embedding_models() -> List[Dict[str, Any]]:
@@ -687,11 +853,14 @@ class OllamaPackage:
         return await asyncio.to_thread(fetch_embedding_models)
 
 
+# Expressions the calculate tool accepts: digits, arithmetic operators and parentheses
+_CALCULATOR_EXPRESSION_RE = re.compile(r'^[0-9+\-*/().\s]+$')
+
+
 # Custom tools that can be added to agents
 @tool
 def get_current_time() -> str:
     """Get the current time."""
-    from datetime import datetime
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
@@ -700,8 +869,7 @@ def calculate(expression: str) -> str:
     """Safely calculate a mathematical expression."""
     try:
         # Simple calculator - only allow basic operations
-        import re
-        if re.match(r'^[0-9+\-*/().\s]+$', expression):
+        if _CALCULATOR_EXPRESSION_RE.match(expression):
             result = eval(expression)
             return str(result)
         else:
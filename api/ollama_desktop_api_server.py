@@ -5,13 +5,13 @@ or python -m uvicorn ollama_api_server:app --reload
 """
 
 import os
-import json
 import asyncio
 import webbrowser  # Add this import
 import threading
 import time
 from typing import Dict, List, Optional, Any, Union, AsyncGenerator
 import tempfile
+import uuid
 import shutil
 from pathlib import Path
 from contextlib import asynccontextmanager
@@ -25,15 +25,19 @@ parent_dir = os.path.dirname(script_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+import orjson
 import uvicorn
 from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Form
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.ollama_client import OllamaPackage, OllamaMCPAgent, app_logger
+from api.ollama_client import OllamaPackage, OllamaMCPAgent, app_logger, close_shared_clients
 from api import db  # Import our new database module
 from api.config_io import read_ollama_config, write_ollama_config
+from api.pdf_text import shutdown_pool as shutdown_pdf_pool
+from api.async_utils import iterate_in_thread
+from api.sse import SSE_DONE, sse_event, sse_words
 from api.mcp_agents.routes import router as mcp_agents_router  # Import the MCP agents router
 
 # Import system prompt management functions
@@ -81,6 +85,8 @@ async def lifespan(app: FastAPI):
     # Shutdown
     app_logger.info("Shutting down application, cleaning up resources...")
     app_logger.info("MCP agents cleanup will be handled by the MCP agents router")
+    await close_shared_clients()
+    shutdown_pdf_pool()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -229,6 +235,7 @@ class SettingsConfig(BaseModel):
     theme: str = "system"
     auto_save_chats: bool = True
     max_chat_history: int = 1000
+    cache_pdf_text: bool = False
 
 class SettingsResponse(BaseModel):
     config: SettingsConfig
@@ -243,12 +250,12 @@ class UpdateSettingsRequest(BaseModel):
     theme: Optional[str] = None
     auto_save_chats: Optional[bool] = None
     max_chat_history: Optional[int] = None
+    cache_pdf_text: Optional[bool] = None
 
 # ----- Helper Functions -----
 
 def generate_session_id() -> str:
     """Generate a unique session ID"""
-    import uuid
     return f"session-{uuid.uuid4()}"
 
 async def cleanup_session(session_id: str):
@@ -363,11 +370,8 @@ async def chat_message(request: ChatRequest):
         # Get response from agent
         response = await agent.chat(request.message)
         
-        # Save assistant response to history
-        await db.add_chat_message(request.session_id, "assistant", response)
-        
-        # Update session activity
-        await db.update_session_activity(request.session_id)
+        # Save assistant response to history and update session activity
+        await db.add_chat_message_and_touch_session(request.session_id, "assistant", response)
         
         return ChatResponse(
             response=response,
@@ -389,7 +393,7 @@ async def chat_message_stream(request: ChatRequest):
     if request.session_id not in active_agents:
         raise HTTPException(status_code=404, detail=f"Session {request.session_id} not found")
     
-    async def generate_stream() -> AsyncGenerator[str, None]:
+    async def generate_stream() -> AsyncGenerator[bytes, None]:
         """Generate streaming response from Ollama"""
         try:
             agent = active_agents[request.session_id]
@@ -406,21 +410,21 @@ async def chat_message_stream(request: ChatRequest):
                 streamed_successfully = False
                 
                 try:
-                    # Get streaming response from Agno agent
-                    run_response = agent.agent.run(request.message, stream=True)
+                    # Get streaming response from Agno agent; arun streams natively
+                    # on the event loop instead of blocking it between chunks
+                    run_response = await agent.agent.arun(request.message, stream=True)
                     
-                    for chunk in run_response:
+                    async for chunk in run_response:
                         if hasattr(chunk, 'content') and chunk.content:
                             # Stream content in small chunks to preserve formatting but reduce overhead
                             content = chunk.content
                             full_response.append(content)
                             
-                            # Split content into words but preserve spaces and newlines
-                            import re
-                            parts = re.findall(r'\S+|\s+', content)
-                            for part in parts:
-                                yield f"data: {json.dumps({'text': part})}\n\n"
-                                await asyncio.sleep(0.02)  # Small delay for streaming effect
+                            # Split content into words but preserve spaces and newlines;
+                            # chunks already arrive at generation pace, so forward them
+                            # without the artificial delay the fallback path uses
+                            for event in sse_words(content):
+                                yield event
                             
                             streamed_successfully = True
                             
@@ -434,32 +438,26 @@ async def chat_message_stream(request: ChatRequest):
                     full_response = [response]
                     
                     # Stream word by word while preserving all whitespace characters
-                    import re
-                    parts = re.findall(r'\S+|\s+', response)
-                    for part in parts:
-                        # Send all parts including spaces and newlines
-                        yield f"data: {json.dumps({'text': part})}\n\n"
+                    for event in sse_words(response):
+                        yield event
                         await asyncio.sleep(0.03)  # Slightly longer delay for fallback
                 
                 complete_response = ''.join(full_response)
                 
-                # Update session activity
-                await db.update_session_activity(request.session_id)
-                
-                # Save assistant response to history
-                await db.add_chat_message(request.session_id, "assistant", complete_response)
+                # Save assistant response to history and update session activity
+                await db.add_chat_message_and_touch_session(request.session_id, "assistant", complete_response)
                 
                 # Send completion signal
-                yield f"data: {json.dumps({'done': True})}\n\n"
+                yield SSE_DONE
                 
             except Exception as e:
                 app_logger.error(f"Error during streaming: {str(e)}", exc_info=True)
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                yield sse_event({'error': str(e)})
                 raise
             
         except Exception as e:
             app_logger.error(f"Error streaming chat message: {str(e)}", exc_info=True)
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield sse_event({'error': str(e)})
     
     return StreamingResponse(
         generate_stream(),
@@ -501,7 +499,7 @@ async def get_models():
         # 1. Get currently available models from Ollama
         # This function should ideally return List[Dict[str, Any]] or List[str]
         available_models = await OllamaPackage.get_available_models()
-        app_logger.info(f"Available models fetched from Ollama: {available_models}")
+        app_logger.info(f"Fetched {len(available_models)} available models from Ollama.")
 
         # 2. Format the models for the response (handle list of strings or dicts)
         models_list = []
@@ -537,6 +535,21 @@ async def get_models():
         # If fetching fails, raise error. Consider returning stale cache if critical.
         raise HTTPException(status_code=500, detail=f"Error getting models from Ollama: {str(e)}")
 
+@app.get("/models/info", tags=["Models"])
+async def get_all_models_info():
+    """
+    Get every available model together with its info in one request.
+
+    - Saves the client from calling /models/{model_name}/info once per model
+    - The lookups run concurrently on the server
+    """
+    try:
+        models = await OllamaPackage.list_models_with_info()
+        return {"models": models}
+    except Exception as e:
+        app_logger.error(f"Error getting info for available models: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error getting info for available models: {str(e)}")
+
 @app.get("/models/{model_name:path}/info", tags=["Models"])
 async def get_specific_model_info(model_name: str):
     """
@@ -692,9 +705,8 @@ async def upload_file_to_session(session_id: str, file: UploadFile = File(...)):
     Upload a file (.txt, .md, .pdf) to add its content as context to a session.
 
     - Validates the session ID and file type.
-    - Saves the file temporarily.
+    - Reads the uploaded file into memory.
     - Processes the file content and adds it to the session's context.
-    - Cleans up the temporary file.
     """
     agent: Optional[OllamaAgent] = None
 
@@ -712,7 +724,7 @@ async def upload_file_to_session(session_id: str, file: UploadFile = File(...)):
         else:
              raise HTTPException(status_code=404, detail=f"Session {session_id} not found.")
 
-    if not agent:
+    if not agent or not agent.agent:
          raise HTTPException(status_code=500, detail=f"Could not retrieve agent instance for session {session_id}.")
 
     # Validate file extension
@@ -723,44 +735,36 @@ async def upload_file_to_session(session_id: str, file: UploadFile = File(...)):
             detail=f"Invalid file type. Allowed extensions are: {', '.join(ALLOWED_EXTENSIONS)}"
         )
 
-    # Create a temporary directory to store the uploaded file
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_file_path = Path(temp_dir) / file.filename
-
-        # Save the uploaded file to the temporary path
-        try:
-            with open(temp_file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            app_logger.info(f"Temporarily saved uploaded file to: {temp_file_path}")
-        except Exception as e:
-             app_logger.error(f"Failed to save uploaded file: {e}")
-             raise HTTPException(status_code=500, detail="Failed to save uploaded file.")
-        finally:
-             # Ensure the file pointer is closed, even if copyfileobj fails
-             file.file.close()
-
-        # Process the file using the agent's method
-        try:
-            await agent.add_file_context(temp_file_path, file.filename)
-            app_logger.info(f"Successfully processed file context for session {session_id} from {file.filename}")
-            return {"message": f"File '{file.filename}' processed and added to context for session {session_id}"}
-        except FileNotFoundError as e:
-             app_logger.error(f"File not found during processing: {e}")
-             raise HTTPException(status_code=500, detail="Internal error: Saved file could not be found for processing.")
-        except ImportError as e:
-            # Specifically catch missing pypdf
-            if "pypdf" in str(e):
-                app_logger.error(f"PDF processing error for {file.filename}: {e}")
-                raise HTTPException(status_code=400, detail="Cannot process PDF file: pypdf library is not installed.")
-            else:
-                app_logger.error(f"Import error during processing {file.filename}: {e}")
-                raise HTTPException(status_code=500, detail=f"Internal server error during file processing: {e}")
-        except Exception as e:
-            app_logger.error(f"Failed to process file context for session {session_id}: {e}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
+    # Read the upload into memory; the agent parses it from bytes, so there is
+    # no need to write it to a temporary file and read it back
+    try:
+        content = await file.read()
+    except Exception as e:
+        app_logger.error(f"Failed to read uploaded file: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read uploaded file.")
+    finally:
+        await file.close()
 
-    # The temporary directory and its contents (temp_file_path) are automatically removed here
-    # when the 'with' block exits.
+    # Process the file using the agent's method
+    try:
+        if not await agent.add_file_content(content, file.filename):
+            return {
+                "message": f"File '{file.filename}' is already in the context for session {session_id}; it was not added again",
+                "skipped": True
+            }
+        app_logger.info(f"Successfully processed file context for session {session_id} from {file.filename}")
+        return {"message": f"File '{file.filename}' processed and added to context for session {session_id}"}
+    except ImportError as e:
+        # Specifically catch missing pypdf
+        if "pypdf" in str(e):
+            app_logger.error(f"PDF processing error for {file.filename}: {e}")
+            raise HTTPException(status_code=400, detail="Cannot process PDF file: pypdf library is not installed.")
+        else:
+            app_logger.error(f"Import error during processing {file.filename}: {e}")
+            raise HTTPException(status_code=500, detail=f"Internal server error during file processing: {e}")
+    except Exception as e:
+        app_logger.error(f"Failed to process file context for session {session_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
 
 # Add Vision Chat endpoint
 @app.post("/chat/vision", response_model=ChatResponse, tags=["Chat"])
@@ -780,8 +784,7 @@ async def chat_vision(
     else:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
     # Save user message and update activity
-    await db.add_chat_message(session_id, "user", message + f" [images: {[file.filename for file in images]}]")
-    await db.update_session_activity(session_id)
+    await db.add_chat_message_and_touch_session(session_id, "user", message + f" [images: {[file.filename for file in images]}]")
     # Save uploaded images to a temporary directory
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_image_paths = []
@@ -792,9 +795,8 @@ async def chat_vision(
             temp_image_paths.append(str(temp_path))
         # Call the vision chat method
         response_content = await agent.chat_with_image(message, temp_image_paths)
-    # Save assistant response
-    await db.add_chat_message(session_id, "assistant", response_content)
-    await db.update_session_activity(session_id)
+    # Save assistant response and update activity
+    await db.add_chat_message_and_touch_session(session_id, "assistant", response_content)
     return ChatResponse(response=response_content, session_id=session_id)
 
 # Add scraped models endpoint
@@ -804,11 +806,15 @@ async def get_scraped_models():
     Scrape models from ollama.com and return popular, vision, tools, and newest models.
     """
     try:
-        popular = await asyncio.to_thread(fetch_popular_models)
-        vision = await asyncio.to_thread(fetch_vision_models)
-        tools = await asyncio.to_thread(fetch_tools_models)
-        newest = await asyncio.to_thread(fetch_newest_models)
-        embedding = await asyncio.to_thread(fetch_embedding_models)
+        # The five pages are independent, so fetch them concurrently: the
+        # endpoint waits for the slowest page rather than the sum of all five
+        popular, vision, tools, newest, embedding = await asyncio.gather(
+            asyncio.to_thread(fetch_popular_models),
+            asyncio.to_thread(fetch_vision_models),
+            asyncio.to_thread(fetch_tools_models),
+            asyncio.to_thread(fetch_newest_models),
+            asyncio.to_thread(fetch_embedding_models),
+        )
         return {
             "popular": popular,
             "vision": vision,
@@ -827,10 +833,14 @@ async def pull_model_endpoint(model_name: str, stream: bool = True):
     Pull the specified Ollama model and stream progress updates as newline-delimited JSON.
     """
     def iter_progress():
+        global _model_cache
         for progress in OllamaPackage.pull_model(model_name, stream=stream):
             # Convert to plain dict for JSON serialization
             if isinstance(progress, dict):
                 progress_data = progress
+            elif hasattr(progress, "model_dump"):
+                # pydantic v2 responses (ollama>=0.4); .dict() would warn on every frame
+                progress_data = progress.model_dump()
             elif hasattr(progress, "dict") and callable(progress.dict):
                 progress_data = progress.dict()
             else:
@@ -838,9 +848,13 @@ async def pull_model_endpoint(model_name: str, stream: bool = True):
                     progress_data = vars(progress)
                 except Exception:
                     progress_data = progress
-            # Fallback to default=str for any non-serializable values
-            yield json.dumps(progress_data, default=str) + "\n"
-    return StreamingResponse(iter_progress(), media_type="application/x-ndjson")
+            # Encode straight to a newline-terminated bytes line; fall back to
+            # str for any non-serializable values
+            yield orjson.dumps(progress_data, default=str, option=orjson.OPT_APPEND_NEWLINE)
+        # The pulled model should show up in the next model listing
+        OllamaPackage.invalidate_model_list()
+        _model_cache = None
+    return StreamingResponse(iterate_in_thread(iter_progress), media_type="application/x-ndjson")
 
 # ----- Settings Endpoints -----
 
@@ -868,7 +882,8 @@ async def get_settings():
             active_system_prompt_id=active_prompt_id,
             theme=config.get("theme", "system") if config else "system",
             auto_save_chats=config.get("auto_save_chats", True) if config else True,
-            max_chat_history=config.get("max_chat_history", 1000) if config else 1000
+            max_chat_history=config.get("max_chat_history", 1000) if config else 1000,
+            cache_pdf_text=config.get("cache_pdf_text", False) if config else False
         )
         
         return SettingsResponse(config=settings_config)
@@ -929,6 +944,9 @@ async def update_settings(request: UpdateSettingsRequest):
                 raise HTTPException(status_code=400, detail="max_chat_history must be at least 1")
             config["max_chat_history"] = request.max_chat_history
         
+        if request.cache_pdf_text is not None:
+            config["cache_pdf_text"] = request.cache_pdf_text
+        
         # Save the updated configuration
         write_ollama_config(config)
         
@@ -941,7 +959,8 @@ async def update_settings(request: UpdateSettingsRequest):
             active_system_prompt_id=config.get("activeSystemPrompt", "default"),
             theme=config.get("theme", "system"),
             auto_save_chats=config.get("auto_save_chats", True),
-            max_chat_history=config.get("max_chat_history", 1000)
+            max_chat_history=config.get("max_chat_history", 1000),
+            cache_pdf_text=config.get("cache_pdf_text", False)
         )
         
         app_logger.info("Settings updated successfully")
@@ -971,7 +990,8 @@ async def reset_settings():
             "activeSystemPrompt": "default",
             "theme": "system",
             "auto_save_chats": True,
-            "max_chat_history": 1000
+            "max_chat_history": 1000,
+            "cache_pdf_text": False
         }
         
         # Save the default configuration
@@ -986,7 +1006,8 @@ async def reset_settings():
             active_system_prompt_id=default_config["activeSystemPrompt"],
             theme=default_config["theme"],
             auto_save_chats=default_config["auto_save_chats"],
-            max_chat_history=default_config["max_chat_history"]
+            max_chat_history=default_config["max_chat_history"],
+            cache_pdf_text=default_config["cache_pdf_text"]
         )
         
         app_logger.info("Settings reset to defaults")
@@ -0,0 +1,216 @@
+"""
+PDF text extraction helpers.
+
+Large PDFs are split into page ranges and extracted in parallel by a
+shared pool of worker processes. Extracted texts are cached by content
+digest and extractor, in memory and, when enabled, on disk, so a
+document is only parsed once across uploads and restarts.
+This module is kept free of heavy imports so spawning a worker stays cheap.
+"""
+import contextlib
+import functools
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+# PDFs with at least this many pages are extracted across worker processes,
+# PAGES_PER_TASK pages at a time; smaller ones are extracted in-process.
+PARALLEL_MIN_PAGES = 40
+PAGES_PER_TASK = 10
+
+# Worker pool shared by all extractions, created on first use. Workers are
+# spawned rather than forked, since forking the threaded server is unsafe.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Recently extracted texts keyed by extractor and content digest, so
+# re-uploading the same PDF (to this or another session) skips extraction
+TEXT_CACHE_SIZE = 16
+_text_cache: "OrderedDict[str, str]" = OrderedDict()
+_text_cache_lock = threading.Lock()
+
+# Callers can opt in to persisting texts on disk, one owner-only file per
+# key; the least recently used files are pruned once there are more than
+# TEXT_DISK_CACHE_SIZE of them
+TEXT_CACHE_DIR = Path.home() / ".cache" / "ollama_desktop" / "pdf_text"
+TEXT_DISK_CACHE_SIZE = 256
+
+
+def content_digest(data: bytes) -> bytes:
+    """Return a short BLAKE2b digest identifying a file's contents."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _join_page_text(pages) -> str:
+    """Concatenate the text of the given pages, skipping pages without text."""
+    # extract_text() is expensive, so call it once per page (not once for the
+    # emptiness test and again for the join)
+    parts = []
+    for page in pages:
+        text = page.extract_text()
+        if text:
+            parts.append(text)
+    return "".join(parts)
+
+
+def _extract_document_text(data: bytes) -> str:
+    """Worker task: extract the text of a (partial) PDF document."""
+    import pypdf
+    return _join_page_text(pypdf.PdfReader(io.BytesIO(data)).pages)
+
+
+def _page_range_document(reader, start: int, end: int) -> bytes:
+    """Serialize pages [start, end) of a reader as a standalone PDF."""
+    import pypdf
+    writer = pypdf.PdfWriter()
+    for index in range(start, end):
+        writer.add_page(reader.pages[index])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the shared worker pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the shared worker pool, if one was started."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_pdf_text(data: bytes, max_workers: Optional[int] = None,
+                     disk_cache: bool = False) -> str:
+    """
+    Extract the text of a PDF, in page order.
+
+    This is blocking; call it through asyncio.to_thread from async code.
+    Results are cached in memory for the most recent documents and, if
+    disk_cache is set, on disk across restarts.
+
+    Args:
+        data: Raw PDF bytes
+        max_workers: Upper bound on parallel page-range tasks (defaults to
+            the CPU count)
+        disk_cache: Also read and write the on-disk text cache
+
+    Returns:
+        The concatenated text of all pages
+
+    Raises:
+        ImportError: If pypdf is not installed
+    """
+    # The extractor is part of the key, so switching libraries never serves
+    # text produced by the other one
+    key = f"{_extractor_name()}-{content_digest(data).hex()}"
+    with _text_cache_lock:
+        text = _text_cache.get(key)
+        if text is not None:
+            _text_cache.move_to_end(key)
+            return text
+
+    text = _read_disk_cache(key) if disk_cache else None
+    if text is None:
+        text = _extract_pdf_text(data, max_workers)
+        if disk_cache:
+            _write_disk_cache(key, text)
+
+    with _text_cache_lock:
+        _text_cache[key] = text
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    return text
+
+
+@functools.lru_cache(maxsize=None)
+def _extractor_name() -> str:
+    """Return the name and version of the library _extract_pdf_text uses."""
+    try:
+        import pymupdf
+        return f"pymupdf-{pymupdf.__version__}"
+    except ImportError:
+        pass
+    import pypdf
+    return f"pypdf-{pypdf.__version__}"
+
+
+def _read_disk_cache(key: str) -> Optional[str]:
+    """Return the cached text for a key, or None on a miss or read error."""
+    path = TEXT_CACHE_DIR / f"{key}.txt"
+    try:
+        text = path.read_text(encoding="utf-8")
+        os.utime(path)  # mark as recently used for pruning
+        return text
+    except OSError:
+        return None
+
+
+def _write_disk_cache(key: str, text: str):
+    """Store a text on disk and prune old entries; failures are ignored."""
+    path = TEXT_CACHE_DIR / f"{key}.txt"
+    tmp_path = TEXT_CACHE_DIR / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        TEXT_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # Write a private temp file then rename it, so a concurrent reader or
+        # writer never sees a partial file
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+
+        entries = list(TEXT_CACHE_DIR.glob("*.txt"))
+        if len(entries) > TEXT_DISK_CACHE_SIZE:
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - TEXT_DISK_CACHE_SIZE]:
+                entry.unlink(missing_ok=True)
+    except OSError:
+        with contextlib.suppress(OSError):
+            tmp_path.unlink(missing_ok=True)
+
+
+def _extract_pdf_text(data: bytes, max_workers: Optional[int]) -> str:
+    """Uncached PDF extraction used by extract_pdf_text."""
+    # PyMuPDF extracts in C and is several times faster than pypdf; it is an
+    # optional dependency, so fall back to pypdf when it is not installed
+    try:
+        import pymupdf
+    except ImportError:
+        pymupdf = None
+    if pymupdf is not None:
+        with pymupdf.open(stream=data, filetype="pdf") as doc:
+            return "".join(page.get_text() for page in doc)
+
+    import pypdf
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    workers = min(max_workers or os.cpu_count() or 1, -(-page_count // PAGES_PER_TASK))
+
+    if page_count < PARALLEL_MIN_PAGES or workers < 2:
+        return _join_page_text(reader.pages)
+
+    # Each task gets only its own pages, so workers never parse the whole file
+    pages_per_task = max(PAGES_PER_TASK, -(-page_count // workers))
+    documents = [
+        _page_range_document(reader, start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+    # map() yields results in submission order, so pages stay in order
+    return "".join(_get_pool().map(_extract_document_text, documents))
@@ -2,12 +2,15 @@ import requests
 from bs4 import BeautifulSoup
 import json
 
+# One session for every fetch, so the category pages (fetched together by
+# /models/scraped) share kept-alive TLS connections to ollama.com
+_session = requests.Session()
+_session.headers["User-Agent"] = "Mozilla/5.0 (compatible; model-scraper/1.0)"
+
 # Generic fetcher that accepts query parameters and returns parsed model JSON
 def fetch_models(params=""):
     url = f"https://ollama.com/search{params}"
-    resp = requests.get(url, headers={
-        "User-Agent": "Mozilla/5.0 (compatible; model-scraper/1.0)"
-    })
+    resp = _session.get(url)
     resp.raise_for_status()
     soup = BeautifulSoup(resp.text, "html.parser")
 
@@ -0,0 +1,43 @@
+"""
+Server-sent event framing shared by the streaming endpoints.
+
+Events are built as bytes, so orjson output is joined as-is and
+StreamingResponse does not re-encode them.
+"""
+import re
+from typing import Any, Iterator
+
+import orjson
+
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+# {"text": ...} events are framed around the serialized string alone, which
+# yields the same bytes as serializing the dict without building one
+_SSE_TEXT_PREFIX = _SSE_PREFIX + b'{"text":'
+_SSE_TEXT_SUFFIX = b"}" + _SSE_SUFFIX
+
+# Words and the whitespace runs between them
+_WORD_RE = re.compile(r'\S+|\s+')
+
+# Sent once a stream has finished
+SSE_DONE = _SSE_PREFIX + orjson.dumps({"done": True}) + _SSE_SUFFIX
+
+
+def sse_event(obj: Any) -> bytes:
+    """Frame a JSON-serializable object as one event."""
+    return _SSE_PREFIX + orjson.dumps(obj) + _SSE_SUFFIX
+
+
+def sse_text(text: str) -> bytes:
+    """Frame a {"text": text} event."""
+    return _SSE_TEXT_PREFIX + orjson.dumps(text) + _SSE_TEXT_SUFFIX
+
+
+def sse_words(text: str) -> Iterator[bytes]:
+    """
+    Yield one text event per word and per whitespace run of text.
+
+    Clients get word-sized events with spaces and newlines preserved.
+    """
+    for match in _WORD_RE.finditer(text):
+        yield sse_text(match.group())